@@ -1,48 +1,21 @@
 import os
-import json
 import re
+from catalog import load_catalog
 
 def rename_files():
-    # Paths to the JSON files
-    burst_json_path = os.path.join("AddressablesJSON", "lobby_burst_merged_data.json")
-    event_json_path = os.path.join("AddressablesJSON", "lobby_event_data.json")
     source_folder = "temp-renaming"
 
-    # Load standard character data (burst/lobby)
-    try:
-        with open(burst_json_path, 'r', encoding='utf-8') as f:
-            character_data = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: JSON file not found at {burst_json_path}")
-        return
-    except json.JSONDecodeError:
-        print(f"Error: Invalid JSON file at {burst_json_path}")
-        return
-
-    # Load event character data
-    try:
-        with open(event_json_path, 'r', encoding='utf-8') as f:
-            event_data = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: JSON file not found at {event_json_path}")
-        return
-    except json.JSONDecodeError:
-        print(f"Error: Invalid JSON file at {event_json_path}")
+    # Load the bundle catalog (standard and event characters)
+    catalog = load_catalog()
+    if not catalog.version:
+        print("Error: no usable catalog found in AddressablesJSON")
         return
 
-    # Create mapping for standard characters: (ID, skin_code) -> {lobby_id, burst_id}
-    character_mapping = {}
-    for character in character_data:
-        key = (character["ID"], character["skin_code"])
-        character_mapping[key] = {
-            "lobby_id": character["lobby_id"],
-            "burst_id": character["burst_id"]
-        }
+    # Mapping for standard characters: (ID, skin_code) -> {lobby_id, burst_id}
+    character_mapping = catalog.standard
 
-    # Create mapping for event characters: ID -> lobby_id
-    event_mapping = {}
-    for item in event_data:
-        event_mapping[item["ID"]] = item["lobby_id"]
+    # Mapping for event characters: ID -> {lobby_id}
+    event_mapping = catalog.events
 
     # Iterate over files and rename them
     for filename in os.listdir(source_folder):
@@ -73,7 +46,7 @@ def rename_files():
                 
                 # For events, we use the lobby_id from the JSON regardless of file type
                 if id_part in event_mapping:
-                    new_id = event_mapping[id_part]
+                    new_id = event_mapping[id_part]["lobby_id"]
                 else:
                     print(f"Skipping {filename} - no mapping found for event ID '{id_part}'")
                     continue
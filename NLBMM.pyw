@@ -8,14 +8,21 @@ import tempfile
 import UnityPy
 import re
 import urllib.request
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from catalog import load_catalog, update_catalog
+from fingerprints import FingerprintStore, stat_key
+from thumbnails import render_thumbnail, cached_thumbnail, THUMBNAIL_CACHE_DIR
+from mod_analysis import target_slot, slot_conflicts, analyze_library, removable_groups, resolve_duplicates
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton,
     QScrollArea, QHBoxLayout, QLabel, QLineEdit,
     QFileDialog, QMessageBox, QProgressDialog, QTableWidget,
     QTableWidgetItem, QHeaderView
 )
-from PyQt6.QtGui import QIcon, QColor, QPalette
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
+from PyQt6.QtGui import QIcon, QColor, QPalette, QPixmap
+from PyQt6.QtCore import Qt, QObject, QThread, pyqtSignal, QTimer
 
 def download_file(url, destination):
     """Downloads a file from a URL to a destination path."""
@@ -106,6 +113,133 @@ class AssetExtractor(QThread):
     def cancel(self):
         self.cancelled = True
 
+class ThumbnailLoader(QObject):
+    thumbnail_ready = pyqtSignal(str, str)
+    retry_signal = pyqtSignal()
+    rendered_signal = pyqtSignal(str, object, object)
+
+    # A bundle that was in flight this many times when the pool broke is given up on
+    MAX_POOL_CRASHES = 2
+
+    def __init__(self, fingerprints, cache_dir=THUMBNAIL_CACHE_DIR):
+        super().__init__()
+        self.fingerprints = fingerprints
+        self.cache_dir = cache_dir
+        self.results = {}  # bundle path -> thumbnail path, "" if the bundle has none
+        # Failures are keyed by (path, size, mtime_ns), so a mod that is replaced or fixed is tried again
+        self.pending = {}  # bundle path -> its key when it was submitted
+        self.failed = set()  # keys of bundles that could not be rendered
+        self.crashes = {}  # key -> times its worker pool broke while it was in flight
+        self.executor = None
+        # While the library analyzer is hashing every mod, uncached bundles wait for it
+        # instead of being hashed a second time by a worker
+        self.wait_for_fingerprints = False
+        # Futures complete on a pool thread, the signal hands them back to the GUI thread
+        self.rendered_signal.connect(self.on_rendered)
+
+    def request(self, bundle_path):
+        """Emit thumbnail_ready for a bundle, rendering it in the background if needed."""
+        if bundle_path in self.pending:
+            return
+        try:
+            key = (bundle_path, *stat_key(bundle_path))
+        except OSError:
+            return  # Removed since the list was loaded
+        if key in self.failed:
+            return
+
+        fingerprint = self.fingerprints.cached(bundle_path)
+        if fingerprint is None:
+            self.results.pop(bundle_path, None)
+            if self.wait_for_fingerprints:
+                return
+        elif bundle_path not in self.results:
+            cached = cached_thumbnail(self.cache_dir, fingerprint)
+            if cached is not None:
+                self.results[bundle_path] = cached
+
+        if bundle_path in self.results:
+            self.thumbnail_ready.emit(bundle_path, self.results[bundle_path])
+            return
+
+        self.pending[bundle_path] = key
+        try:
+            future = self.get_executor().submit(render_thumbnail, bundle_path, self.cache_dir, fingerprint)
+        except BrokenProcessPool:
+            # A worker died (e.g. on a malformed bundle), start a fresh pool
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            future = self.get_executor().submit(render_thumbnail, bundle_path, self.cache_dir, fingerprint)
+        executor = self.executor
+        future.add_done_callback(lambda f, p=bundle_path, e=executor: self.rendered_signal.emit(p, f, e))
+
+    def get_executor(self):
+        if self.executor is None:
+            workers = max(1, min(4, (os.cpu_count() or 2) - 1))
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.executor
+
+    def on_rendered(self, bundle_path, future, executor):
+        key = self.pending.pop(bundle_path)
+        if future.cancelled():
+            return
+        try:
+            size, mtime_ns, fingerprint, thumbnail = future.result()
+            self.fingerprints.record(bundle_path, size, mtime_ns, fingerprint)
+        except BrokenProcessPool:
+            # Every future in flight fails when one worker dies, so this bundle is not
+            # necessarily the culprit: drop the dead pool and let the next request retry it
+            if executor is self.executor:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+            self.crashes[key] = self.crashes.get(key, 0) + 1
+            if self.crashes[key] >= self.MAX_POOL_CRASHES:
+                print(f"Error rendering thumbnail for {bundle_path}: worker process crashed")
+                self.failed.add(key)
+            else:
+                self.retry_signal.emit()
+            return
+        except Exception as e:
+            print(f"Error rendering thumbnail for {bundle_path}: {e}")
+            self.failed.add(key)
+            return
+        self.results[bundle_path] = thumbnail
+        self.thumbnail_ready.emit(bundle_path, thumbnail)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+class LibraryAnalyzer(QThread):
+    progress_signal = pyqtSignal(int, str)
+    finished_signal = pyqtSignal(object)
+
+    def __init__(self, mods, catalog, fingerprints):
+        super().__init__()
+        self.mods = mods
+        self.catalog = catalog
+        self.fingerprints = fingerprints
+        self.cancelled = False
+
+    def run(self):
+        try:
+            report = analyze_library(
+                self.mods, self.catalog, self.fingerprints,
+                progress=self.progress_signal.emit,
+                cancelled=lambda: self.cancelled
+            )
+        except Exception as e:
+            print(f"Library analysis failed: {e}")
+            report = None
+        self.finished_signal.emit(report)
+
+    def cancel(self):
+        self.cancelled = True
+
 class SpineViewer(QWidget):
     def __init__(self):
         super().__init__()
@@ -114,8 +248,6 @@ class SpineViewer(QWidget):
         self.setWindowTitle("NIKKE Lobby/Burst Mod Manager")
         self.setGeometry(100, 100, 1200, 800)
         self.viewer_processes = []
-        self.character_data = []
-        self.character_url_data = []
 
         # Run automatic updaters first
         self.check_json_updates()
@@ -125,8 +257,7 @@ class SpineViewer(QWidget):
         self.character_map = self.load_character_map()
         self.settings = self.load_settings()
         self.naps_settings = self.load_naps_settings()
-        self.load_character_data()
-        self.load_character_url_data()
+        self.catalog = load_catalog()
 
         self.set_windows11_dark_theme()
 
@@ -168,22 +299,32 @@ class SpineViewer(QWidget):
         clear_btn = QPushButton("Clear")
         clear_btn.clicked.connect(self.clear_search)
         search_layout.addWidget(clear_btn)
+        activate_selected_btn = QPushButton("Activate Selected")
+        activate_selected_btn.clicked.connect(self.activate_selected_mods)
+        search_layout.addWidget(activate_selected_btn)
+        self.duplicates_btn = QPushButton("Resolve Duplicates")
+        self.duplicates_btn.setEnabled(False)
+        self.duplicates_btn.clicked.connect(self.resolve_duplicate_mods)
+        search_layout.addWidget(self.duplicates_btn)
         main_layout.addLayout(search_layout)
 
         self.table_widget = QTableWidget()
-        self.table_widget.setColumnCount(8)
-        self.table_widget.setHorizontalHeaderLabels(["Author", "ID", "Character", "Skin", "Mod Name", "Type", "Status", "Actions"])
+        self.table_widget.setColumnCount(10)
+        self.table_widget.setHorizontalHeaderLabels(["Thumbnail", "Author", "ID", "Character", "Skin", "Mod Name", "Type", "Status", "Conflicts", "Actions"])
         
         header = self.table_widget.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Interactive)
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)
+        header.resizeSection(0, 80)
         header.setSectionResizeMode(1, QHeaderView.ResizeMode.Interactive)
-        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
-        header.setSectionResizeMode(3, QHeaderView.ResizeMode.Interactive)
-        header.setSectionResizeMode(4, QHeaderView.ResizeMode.Stretch)
-        header.setSectionResizeMode(5, QHeaderView.ResizeMode.Interactive)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Interactive)
+        header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(4, QHeaderView.ResizeMode.Interactive)
+        header.setSectionResizeMode(5, QHeaderView.ResizeMode.Stretch)
         header.setSectionResizeMode(6, QHeaderView.ResizeMode.Interactive)
-        header.setSectionResizeMode(7, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(7, QHeaderView.ResizeMode.Interactive)
+        header.setSectionResizeMode(8, QHeaderView.ResizeMode.Interactive)
+        header.setSectionResizeMode(9, QHeaderView.ResizeMode.ResizeToContents)
 
         self.table_widget.verticalHeader().setVisible(False)
         self.table_widget.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
@@ -192,98 +333,44 @@ class SpineViewer(QWidget):
         self.table_widget.verticalHeader().setMinimumSectionSize(40)
         
         main_layout.addWidget(self.table_widget)
+        self.analysis_label = QLabel("")
+        main_layout.addWidget(self.analysis_label)
         self.setLayout(main_layout)
 
         self.current_extraction = None
         self.progress_dialog = None
 
+        # Thumbnails are rendered off the GUI thread, only for rows that are on screen
+        self.row_paths = []
+        self.path_rows = {}
+        self.mod_infos = {}
+        self.fingerprints = FingerprintStore()
+        self.thumbnails = ThumbnailLoader(self.fingerprints)
+        self.thumbnails.thumbnail_ready.connect(self.show_thumbnail)
+        self.thumbnails.retry_signal.connect(self.schedule_thumbnails)
+        self.thumbnail_timer = QTimer(self)
+        self.thumbnail_timer.setSingleShot(True)
+        self.thumbnail_timer.setInterval(50)
+        self.thumbnail_timer.timeout.connect(self.request_visible_thumbnails)
+        self.table_widget.verticalScrollBar().valueChanged.connect(self.schedule_thumbnails)
+
+        # Slot conflicts and duplicates are found in the background after every reload
+        self.analyzer = None
+        self.finished_analyzers = []
+        self.analysis_report = None
+        # Typing a folder path reloads on every keystroke, only analyze once it settles
+        self.analysis_timer = QTimer(self)
+        self.analysis_timer.setSingleShot(True)
+        self.analysis_timer.setInterval(500)
+        self.analysis_timer.timeout.connect(self.start_library_analysis)
+
         self.verify_mods_folder()
         self.folder_edit.textChanged.connect(self.folder_path_changed)
         self.naps_edit.textChanged.connect(self.naps_path_changed)
 
-    def load_character_data(self):
-        self.character_data = []
-        
-        files_to_load = [
-            os.path.join("AddressablesJSON", "lobby_burst_merged_data.json"),
-            os.path.join("AddressablesJSON", "lobby_event_data.json")
-        ]
-        
-        for file_path in files_to_load:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    self.character_data.extend(json.load(f))
-            except FileNotFoundError:
-                print(f"Data file not found: {file_path}")
-            except Exception as e:
-                print(f"Error loading character data from {file_path}: {e}")
-
-    def load_character_url_data(self):
-        self.character_url_data = []
-        
-        files_to_load = [
-            os.path.join("AddressablesJSON", "lobby_burst_merged_data_URL.json"),
-            os.path.join("AddressablesJSON", "lobby_event_data_URL.json")
-        ]
-
-        for file_path in files_to_load:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    self.character_url_data.extend(json.load(f))
-            except FileNotFoundError:
-                print(f"URL data file not found: {file_path}")
-            except Exception as e:
-                print(f"Error loading character URL data from {file_path}: {e}")
-
     def check_json_updates(self):
-        """Checks for updates to JSON data files from GitHub and overwrites them if different."""
-        files_to_check = {
-            "lobby_burst_merged_data.json": "https://raw.githubusercontent.com/kxdekxde/nikke-lobbyburst-mod-manager/refs/heads/main/AddressablesJSON/lobby_burst_merged_data.json",
-            "lobby_burst_merged_data_URL.json": "https://raw.githubusercontent.com/kxdekxde/nikke-lobbyburst-mod-manager/refs/heads/main/AddressablesJSON/lobby_burst_merged_data_URL.json",
-            "lobby_event_data.json": "https://raw.githubusercontent.com/kxdekxde/nikke-lobbyburst-mod-manager/refs/heads/main/AddressablesJSON/lobby_event_data.json",
-            "lobby_event_data_URL.json": "https://raw.githubusercontent.com/kxdekxde/nikke-lobbyburst-mod-manager/refs/heads/main/AddressablesJSON/lobby_event_data_URL.json"
-        }
-
-        local_dir = "AddressablesJSON"
-        os.makedirs(local_dir, exist_ok=True)
-
-        for filename, url in files_to_check.items():
-            local_path = os.path.join(local_dir, filename)
-            temp_path = os.path.join(tempfile.gettempdir(), f"temp_{filename}")
-
-            try:
-                print(f"Checking for updates for {filename}...")
-                if not download_file(url, temp_path):
-                    print(f"Failed to download {filename}. Skipping update check.")
-                    continue
-
-                update_required = not os.path.exists(local_path)
-
-                if not update_required:
-                    # Compare file content to see if an update is needed
-                    try:
-                        with open(local_path, 'r', encoding='utf-8') as f_local, \
-                             open(temp_path, 'r', encoding='utf-8') as f_temp:
-                            if json.load(f_local) != json.load(f_temp):
-                                update_required = True
-                    except (json.JSONDecodeError, UnicodeDecodeError):
-                        # Fallback to text comparison if JSON parsing fails
-                        with open(local_path, 'r', encoding='utf-8', errors='ignore') as f_local, \
-                             open(temp_path, 'r', encoding='utf-8', errors='ignore') as f_temp:
-                            if f_local.read() != f_temp.read():
-                                update_required = True
-                
-                if update_required:
-                    shutil.copy(temp_path, local_path)
-                    print(f"Updated {filename} from GitHub.")
-                else:
-                    print(f"{filename} is already up to date.")
-
-            except Exception as e:
-                print(f"Error while checking/updating {filename}: {e}")
-            finally:
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+        """Brings the bundle catalog up to date, using deltas when only a few records changed."""
+        update_catalog()
 
     def check_csv_updates(self):
         csv_files_to_check = {
@@ -637,33 +724,19 @@ class SpineViewer(QWidget):
 
     def check_mod_status(self, mod_info, mod_path):
         mod_size = os.path.getsize(mod_path)
-        mod_id = mod_info['id']
-        skin_code = mod_info['skin']
-        mod_type = mod_info['type'].lower()
-        is_event_mod = mod_id.startswith("eventscene_") or mod_id.startswith("eventtitle_")
-
-        for char_data in self.character_data:
-            # Match condition for event mods (ID only)
-            is_match = is_event_mod and char_data.get('ID') == mod_id
-            # Match condition for standard mods (ID and skin_code)
-            if not is_event_mod:
-                is_match = char_data.get('ID') == mod_id and char_data.get('skin_code') == skin_code
-
-            if is_match:
-                # Event mods are always lobby type, standard mods can be lobby or burst
-                target_id_key = "lobby_id" if is_event_mod else f"{mod_type}_id"
-                if target_id_key in char_data:
-                    target_id = char_data[target_id_key]
-                    naps_size = self.get_naps_file_size(target_id)
-                    if naps_size and naps_size == mod_size:
-                        return "Active"
-                # Found the character, no need to continue loop
-                return "Inactive"
+        target_id = target_slot(mod_info, self.catalog)
+        if target_id:
+            naps_size = self.get_naps_file_size(target_id)
+            if naps_size and naps_size == mod_size:
+                return "Active"
         return "Inactive"
 
     def load_mods(self):
         mods_folder = self.settings.get("mods_folder", "")
         self.table_widget.setRowCount(0)
+        self.row_paths = []
+        self.path_rows = {}
+        self.mod_infos = {}
         
         if mods_folder and os.path.exists(mods_folder):
             # Store full filenames to avoid reconstruction issues
@@ -673,38 +746,46 @@ class SpineViewer(QWidget):
                 item_path = os.path.join(mods_folder, original_name)
                 self.add_mod_item(original_name, item_path, index)
 
+        self.stop_library_analysis()
+        self.thumbnails.wait_for_fingerprints = bool(self.mod_infos)
+        self.analysis_timer.start()
+        self.schedule_thumbnails()
+
     def add_mod_item(self, original_name, file_path, index):
         row_position = self.table_widget.rowCount()
         self.table_widget.insertRow(row_position)
+        self.row_paths.append(file_path)
+        self.path_rows[file_path] = row_position
         
         info = self.extract_info_from_filename(original_name)
+        self.mod_infos[file_path] = info
         status = self.check_mod_status(info, file_path)
         
         author_item = QTableWidgetItem(info['author'])
         author_item.setData(Qt.ItemDataRole.UserRole, index) # Store original index
         author_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.table_widget.setItem(row_position, 0, author_item)
+        self.table_widget.setItem(row_position, 1, author_item)
         
         id_item = QTableWidgetItem(info['id'])
         id_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.table_widget.setItem(row_position, 1, id_item)
+        self.table_widget.setItem(row_position, 2, id_item)
         
         character_item = QTableWidgetItem(info['character'])
         character_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.table_widget.setItem(row_position, 2, character_item)
+        self.table_widget.setItem(row_position, 3, character_item)
         
         skin_item = QTableWidgetItem(info['skin'])
         skin_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.table_widget.setItem(row_position, 3, skin_item)
+        self.table_widget.setItem(row_position, 4, skin_item)
         
         mod_name_item = QTableWidgetItem(info['mod_name'])
         mod_name_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.table_widget.setItem(row_position, 4, mod_name_item)
+        self.table_widget.setItem(row_position, 5, mod_name_item)
         
         type_name = info['type'].capitalize()
         type_item = QTableWidgetItem(type_name)
         type_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.table_widget.setItem(row_position, 5, type_item)
+        self.table_widget.setItem(row_position, 6, type_item)
         
         status_item = QTableWidgetItem(status)
         status_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -715,7 +796,11 @@ class SpineViewer(QWidget):
         elif status == "Inactive":
             status_item.setForeground(QColor("#FA8072"))  # Salmon
             
-        self.table_widget.setItem(row_position, 6, status_item)
+        self.table_widget.setItem(row_position, 7, status_item)
+
+        conflicts_item = QTableWidgetItem("")
+        conflicts_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.table_widget.setItem(row_position, 8, conflicts_item)
         
         actions_widget = QWidget()
         actions_layout = QHBoxLayout(actions_widget)
@@ -737,20 +822,49 @@ class SpineViewer(QWidget):
         
         actions_layout.addStretch()
         actions_widget.setLayout(actions_layout)
-        self.table_widget.setCellWidget(row_position, 7, actions_widget)
+        self.table_widget.setCellWidget(row_position, 9, actions_widget)
         
-        self.table_widget.setRowHeight(row_position, 45)
+        self.table_widget.setRowHeight(row_position, 64)
 
     def activate_mod(self, row):
-        author_item = self.table_widget.item(row, 0)
-        file_index = author_item.data(Qt.ItemDataRole.UserRole)
-        original_filename = self.mod_files.get(file_index)
-
-        if not original_filename:
-            QMessageBox.warning(self, "Error", "Could not find mod file reference.")
+        self.activate_mods([row])
+
+    def activate_selected_mods(self):
+        rows = sorted({
+            index.row() for index in self.table_widget.selectionModel().selectedRows()
+            if not self.table_widget.isRowHidden(index.row())
+        })
+        if not rows:
+            QMessageBox.information(self, "Activate Selected", "Select the mods you want to activate first.")
             return
+        self.activate_mods(rows)
 
+    def activate_mods(self, rows):
         mods_folder = self.settings.get("mods_folder", "")
+        original_filenames = []
+        for row in rows:
+            author_item = self.table_widget.item(row, 1)
+            file_index = author_item.data(Qt.ItemDataRole.UserRole)
+            original_filename = self.mod_files.get(file_index)
+
+            if not original_filename:
+                QMessageBox.warning(self, "Error", "Could not find mod file reference.")
+                return
+            original_filenames.append(original_filename)
+
+        # Mods replacing the same naps file would overwrite each other
+        conflicts = slot_conflicts(
+            [(name, self.extract_info_from_filename(name)) for name in original_filenames],
+            self.catalog
+        )
+        if conflicts:
+            groups = "\n\n".join("\n".join(names) for names in conflicts.values())
+            QMessageBox.warning(
+                self, "Conflicting Mods",
+                f"These mods replace the same file, select only one of each group:\n\n{groups}"
+            )
+            return
+
         script_dir = os.path.dirname(os.path.abspath(__file__))
         temp_renaming = os.path.join(script_dir, "temp-renaming")
         
@@ -758,10 +872,11 @@ class SpineViewer(QWidget):
             # Store current scroll position
             scroll_value = self.table_widget.verticalScrollBar().value()
 
-            original_path = os.path.join(mods_folder, original_filename)
-            if not os.path.exists(original_path):
-                QMessageBox.warning(self, "Error", f"Could not find mod file: {original_filename}")
-                return
+            for original_filename in original_filenames:
+                original_path = os.path.join(mods_folder, original_filename)
+                if not os.path.exists(original_path):
+                    QMessageBox.warning(self, "Error", f"Could not find mod file: {original_filename}")
+                    return
 
             os.makedirs(temp_renaming, exist_ok=True)
 
@@ -773,7 +888,8 @@ class SpineViewer(QWidget):
                 except Exception as e:
                     print(f"Failed to delete {file_path}: {e}")
 
-            shutil.copy2(original_path, temp_renaming)
+            for original_filename in original_filenames:
+                shutil.copy2(os.path.join(mods_folder, original_filename), temp_renaming)
 
             rename_script = os.path.join(script_dir, "1_rename-temprenaming.py")
             if os.path.exists(rename_script):
@@ -789,7 +905,10 @@ class SpineViewer(QWidget):
                 QMessageBox.warning(self, "Error", "Compare script not found")
                 return
 
-            QMessageBox.information(self, "Success", "Mod activated successfully!")
+            if len(original_filenames) == 1:
+                QMessageBox.information(self, "Success", "Mod activated successfully!")
+            else:
+                QMessageBox.information(self, "Success", f"{len(original_filenames)} mods activated successfully!")
             self.load_mods()
             self.filter_mods() # Re-apply filter
             
@@ -805,10 +924,10 @@ class SpineViewer(QWidget):
                 shutil.rmtree(temp_renaming, ignore_errors=True)
 
     def deactivate_mod(self, row):
-        id_item = self.table_widget.item(row, 1)
-        skin_item = self.table_widget.item(row, 3)
-        type_item = self.table_widget.item(row, 5)
-        author_item = self.table_widget.item(row, 0)
+        id_item = self.table_widget.item(row, 2)
+        skin_item = self.table_widget.item(row, 4)
+        type_item = self.table_widget.item(row, 6)
+        author_item = self.table_widget.item(row, 1)
         file_index = author_item.data(Qt.ItemDataRole.UserRole)
         original_mod_filename = self.mod_files.get(file_index)
 
@@ -838,31 +957,13 @@ class SpineViewer(QWidget):
 
             download_url = None
             target_hash = None
-            url_data = self.character_url_data
 
             # Find URL and HASH
-            for i, char_data in enumerate(self.character_data):
-                match = False
-                if is_event_mod and char_data.get('ID') == mod_id:
-                    match = True
-                elif not is_event_mod and char_data.get('ID') == mod_id and char_data.get('skin_code') == skin_code:
-                    match = True
-
-                if match:
-                    hash_key = 'lobby_id' if is_event_mod else f"{mod_type}_id"
-                    target_hash = char_data.get(hash_key)
-                    # Now find the corresponding URL
-                    for char_url_data in url_data:
-                        url_match = False
-                        if is_event_mod and char_url_data.get('ID') == mod_id:
-                             url_match = True
-                        elif not is_event_mod and char_url_data.get('ID') == mod_id and char_url_data.get('skin_code') == skin_code:
-                             url_match = True
-                        
-                        if url_match:
-                            download_url = char_url_data.get(hash_key)
-                            break
-                    break
+            char_data = self.catalog.find(mod_id, skin_code)
+            if char_data:
+                hash_key = 'lobby_id' if is_event_mod else f"{mod_type}_id"
+                target_hash = char_data.get(hash_key)
+                download_url = self.catalog.url(char_data, hash_key)
             
             if not download_url:
                 QMessageBox.warning(self, "Error", "Could not find the download URL for the original file.")
@@ -928,6 +1029,191 @@ class SpineViewer(QWidget):
             
             self.table_widget.setRowHidden(row, not match)
 
+        self.schedule_thumbnails()
+
+    def stop_library_analysis(self):
+        if self.analyzer:
+            self.analyzer.cancel()
+            self.analyzer.finished_signal.disconnect()
+            self.analyzer.progress_signal.disconnect()
+            # Keep a reference until the thread has actually stopped
+            self.finished_analyzers.append(self.analyzer)
+            self.analyzer.finished.connect(self.release_finished_analyzers)
+            self.analyzer = None
+
+        self.analysis_report = None
+        self.duplicates_btn.setEnabled(False)
+        self.analysis_label.setText("")
+
+    def start_library_analysis(self):
+        self.stop_library_analysis()
+        if not self.mod_infos:
+            self.thumbnails.wait_for_fingerprints = False
+            return
+
+        mods_folder = self.settings.get("mods_folder", "")
+        self.fingerprints.prune(mods_folder, self.mod_infos)
+
+        # Hash the rows on screen first, their thumbnails are waiting for the fingerprints
+        visible = {self.row_paths[row] for row in self.visible_rows()}
+        mods = sorted(self.mod_infos.items(), key=lambda item: item[0] not in visible)
+        self.analyzer = LibraryAnalyzer(mods, self.catalog, self.fingerprints)
+        self.analyzer.progress_signal.connect(self.update_analysis_progress)
+        self.analyzer.finished_signal.connect(self.analysis_complete)
+        self.analyzer.start()
+
+    def release_finished_analyzers(self):
+        self.finished_analyzers = [a for a in self.finished_analyzers if a.isRunning()]
+
+    def update_analysis_progress(self, value, message):
+        self.analysis_label.setText(f"Analyzing library... {value}% ({message})")
+        # Pick up thumbnails whose fingerprints are now cached; unlike schedule_thumbnails
+        # this does not restart a pending timer, so steady progress cannot starve it
+        if not self.thumbnail_timer.isActive():
+            self.thumbnail_timer.start()
+
+    def analysis_complete(self, report):
+        if self.sender() is not self.analyzer:
+            return  # Result of a pass that was superseded by a reload
+        self.analyzer = None
+        self.fingerprints.save()
+        self.analysis_report = report
+        self.thumbnails.wait_for_fingerprints = False
+        self.schedule_thumbnails()
+        if report is None:
+            self.analysis_label.setText("")
+            return
+
+        notes = {}
+        for paths in report["slots"].values():
+            for path in paths:
+                others = [os.path.basename(p) for p in paths if p != path]
+                notes.setdefault(path, []).append((f"Slot shared by {len(paths)}", "Same target as: " + ", ".join(others)))
+        for paths in report["duplicates"].values():
+            for path in paths:
+                others = [os.path.basename(p) for p in paths if p != path]
+                notes.setdefault(path, []).append((f"Duplicate x{len(paths)}", "Identical to: " + ", ".join(others)))
+
+        for path, row in self.path_rows.items():
+            item = self.table_widget.item(row, 8)
+            if item is None:
+                continue
+            texts = [text for text, _ in notes.get(path, [])]
+            item.setText(", ".join(texts))
+            item.setToolTip("\n".join(tip for _, tip in notes.get(path, [])))
+            item.setForeground(QColor("#E0A040"))
+
+        self.duplicates_btn.setEnabled(bool(report["duplicates"]))
+        self.analysis_label.setText(
+            f"{len(report['slots'])} slot conflict group(s), "
+            f"{len(report['duplicates'])} duplicate group(s) wasting {report['wasted_bytes'] / 1024 ** 2:.1f} MB"
+        )
+        self.filter_mods() # Re-apply filter, the conflicts column is searchable
+
+    def resolve_duplicate_mods(self):
+        report = self.analysis_report
+        if not report or not report["duplicates"]:
+            return
+
+        targets = report["targets"]
+
+        def describe(path):
+            info = self.mod_infos.get(path)
+            if not info or not targets.get(path):
+                return f"{os.path.basename(path)}  [unknown target]"
+            target = info['id'] if info['skin'] == 'N/A' else f"{info['id']} {info['skin']}"
+            return f"{os.path.basename(path)}  [{target} {info['type'].lower()}]"
+
+        groups = "\n\n".join(
+            "\n".join(describe(p) for p in paths)
+            for paths in report["duplicates"].values()
+        )
+        removable = sum(
+            len(group) - 1
+            for paths in report["duplicates"].values()
+            for group in removable_groups(paths, targets)
+        )
+        box = QMessageBox(self)
+        box.setWindowTitle("Resolve Duplicates")
+        box.setText(
+            f"These files are identical. "
+            f"The first file of each group is kept.\n\n"
+            f"Hardlink keeps every file name. Remove only deletes copies that replace "
+            f"the same file in the game ({removable} file(s)), copies set up for "
+            f"different or unknown targets are never removed.\n\n{groups}"
+        )
+        hardlink_btn = box.addButton("Hardlink", QMessageBox.ButtonRole.AcceptRole)
+        remove_btn = None
+        if removable:
+            remove_btn = box.addButton("Remove", QMessageBox.ButtonRole.DestructiveRole)
+        box.addButton(QMessageBox.StandardButton.Cancel)
+        box.exec()
+
+        clicked = box.clickedButton()
+        if clicked is None or clicked not in (hardlink_btn, remove_btn):
+            return
+
+        handled, errors = resolve_duplicates(
+            report["duplicates"], self.fingerprints, targets,
+            hardlink=clicked is hardlink_btn
+        )
+        self.fingerprints.save()
+        if errors:
+            QMessageBox.warning(self, "Resolve Duplicates", f"{handled} file(s) done, some failed:\n\n" + "\n".join(errors))
+        else:
+            QMessageBox.information(self, "Resolve Duplicates", f"{handled} duplicate file(s) resolved.")
+        scroll_value = self.table_widget.verticalScrollBar().value()
+        self.load_mods()
+        self.filter_mods()
+        self.table_widget.verticalScrollBar().setValue(scroll_value)
+
+    def schedule_thumbnails(self):
+        # Coalesce bursts of scroll/filter/resize events into one request
+        self.thumbnail_timer.start()
+
+    def visible_rows(self):
+        """Rows currently on screen, skipping rows hidden by the filter."""
+        row_count = self.table_widget.rowCount()
+        if not row_count:
+            return []
+        viewport_height = self.table_widget.viewport().height()
+        first = self.table_widget.rowAt(0)
+        last = self.table_widget.rowAt(viewport_height - 1)
+        if first < 0:
+            return []
+        if last < 0:
+            last = row_count - 1
+        return [row for row in range(first, last + 1) if not self.table_widget.isRowHidden(row)]
+
+    def request_visible_thumbnails(self):
+        for row in self.visible_rows():
+            if self.table_widget.cellWidget(row, 0):
+                continue
+            file_path = self.row_paths[row]
+            if file_path.endswith('.skel'):
+                continue
+            self.thumbnails.request(file_path)
+
+    def show_thumbnail(self, bundle_path, thumbnail_path):
+        row = self.path_rows.get(bundle_path)
+        if row is None or not thumbnail_path:
+            return
+        pixmap = QPixmap(thumbnail_path)
+        if pixmap.isNull():
+            return
+        label = QLabel()
+        label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        label.setPixmap(pixmap.scaled(
+            60, 60,
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation
+        ))
+        self.table_widget.setCellWidget(row, 0, label)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.schedule_thumbnails()
+
     def clear_search(self):
         self.search_edit.clear()
 
@@ -1015,6 +1301,14 @@ class SpineViewer(QWidget):
             )
 
     def closeEvent(self, event):
+        if self.analyzer:
+            self.analyzer.cancel()
+            self.analyzer.wait()
+        # Analyzers superseded by a reload are cancelled but may not have stopped yet
+        for analyzer in self.finished_analyzers:
+            analyzer.wait()
+        self.thumbnails.shutdown()
+        self.fingerprints.save()
         shutil.rmtree(self.get_spine_assets_dir(), ignore_errors=True)
         event.accept()
 
@@ -1024,6 +1318,8 @@ class SpineViewer(QWidget):
         return spine_dir
 
 if __name__ == "__main__":
+    # Thumbnail workers are separate processes, which frozen builds must let through
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     
     icon_path = "icon.png"
@@ -0,0 +1,414 @@
+"""
+Compact catalog of the lobby/burst/event bundles and its delta updates.
+
+The catalog replaces the four AddressablesJSON files at runtime. The CDN base URL
+and version are stored once. Every table is stored as a column list plus rows,
+and each bundle URL is kept as a path relative to the base with its hash replaced
+by "{}".
+
+    {"format": 1, "version": 3, "base_url": "...", "digest": "...",
+     "tables": {"lobby_burst": {"columns": [...], "rows": [[...], ...]}, ...}}
+
+Updates are published as one delta per version (deltas/<version>.json) holding the
+added, changed and removed rows since the previous version. Clients chain the deltas
+they are missing and fall back to the full catalog when a delta is missing or the
+result does not match the published digest.
+
+Running this file rebuilds catalog.json from the AddressablesJSON sources and writes
+the delta for the new version.
+"""
+import os
+import json
+import gzip
+import hashlib
+import tempfile
+import urllib.request
+
+CATALOG_FORMAT = 1
+CATALOG_DIR = "AddressablesJSON"
+CATALOG_FILENAME = "catalog.json"
+VERSION_FILENAME = "catalog_version.json"
+DELTAS_DIRNAME = "deltas"
+REMOTE_BASE_URL = "https://raw.githubusercontent.com/kxdekxde/nikke-lobbyburst-mod-manager/refs/heads/main/AddressablesJSON/"
+
+# Longest chain of deltas applied before downloading the full catalog instead
+MAX_DELTA_CHAIN = 10
+
+HASH_PLACEHOLDER = "{}"
+
+# name: (hash columns, key columns, hashes file, URLs file)
+TABLES = {
+    "lobby_burst": (
+        ["burst_id", "lobby_id"],
+        ["ID", "skin_code"],
+        "lobby_burst_merged_data.json",
+        "lobby_burst_merged_data_URL.json",
+    ),
+    "lobby_event": (
+        ["lobby_id"],
+        # Events ship HD and SD bundles under the same ID, the path tells them apart
+        ["ID", "lobby_path"],
+        "lobby_event_data.json",
+        "lobby_event_data_URL.json",
+    ),
+}
+
+
+class CatalogError(Exception):
+    """Raised when a catalog or delta cannot be used."""
+
+
+class Catalog:
+    """
+    Lookup structures built from a compact catalog.
+
+    Rows are exposed as dicts with the same keys as the old AddressablesJSON records
+    plus a "<kind>_path" entry for every "<kind>_id" hash.
+    """
+
+    def __init__(self, data=None):
+        data = data or empty_catalog()
+        self.data = data
+        self.version = data["version"]
+        self.base_url = data["base_url"]
+        self.standard = {}  # (ID, skin_code) -> row
+        self.events = {}  # ID -> row, the HD bundle when there are HD and SD ones
+
+        for name, table in data["tables"].items():
+            columns = table["columns"]
+            for values in table["rows"]:
+                row = dict(zip(columns, values))
+                if name == "lobby_event":
+                    # Decided by the path, not row order: deltas may append a changed HD row after its SD row
+                    current = self.events.get(row["ID"])
+                    if current is None or (is_hd_event(row) and not is_hd_event(current)):
+                        self.events[row["ID"]] = row
+                else:
+                    self.standard.setdefault((row["ID"], row["skin_code"]), row)
+
+    def find(self, mod_id, skin_code=None):
+        """Return the row a mod ID (and skin code for standard mods) targets, or None."""
+        if is_event_id(mod_id):
+            return self.events.get(mod_id)
+        return self.standard.get((mod_id, skin_code))
+
+    def url(self, row, hash_key):
+        """Return the CDN URL of the bundle stored under hash_key ("lobby_id"/"burst_id")."""
+        path = row.get(hash_key.replace("_id", "_path"))
+        if not path or not row.get(hash_key):
+            return None
+        return self.base_url + path.replace(HASH_PLACEHOLDER, row[hash_key])
+
+
+def is_event_id(mod_id):
+    return mod_id.startswith("eventscene_") or mod_id.startswith("eventtitle_")
+
+
+def is_hd_event(row):
+    return "(hd)" in row.get("lobby_path", "")
+
+
+def empty_catalog():
+    return {"format": CATALOG_FORMAT, "version": 0, "base_url": "", "digest": "", "tables": {}}
+
+
+def catalog_digest(data):
+    """SHA-256 over the base URL and the rows of every table, independent of row order."""
+    canonical = {
+        "base_url": data["base_url"],
+        "tables": {
+            name: {"columns": table["columns"], "rows": sorted(table["rows"])}
+            for name, table in sorted(data["tables"].items())
+        },
+    }
+    return hashlib.sha256(
+        json.dumps(canonical, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+def load_catalog(catalog_dir=CATALOG_DIR):
+    """Load the local catalog, or an empty one if it is missing or unreadable."""
+    path = os.path.join(catalog_dir, CATALOG_FILENAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") != CATALOG_FORMAT:
+            raise CatalogError(f"unsupported catalog format {data.get('format')}")
+        return Catalog(data)
+    except FileNotFoundError:
+        print(f"Catalog not found: {path}")
+    except Exception as e:
+        print(f"Error loading catalog from {path}: {e}")
+    return Catalog()
+
+
+def dump_compact(data, stream):
+    """Write a catalog or delta with one row per line, so diffs stay readable."""
+    def rows_block(rows, indent):
+        if not rows:
+            return "[]"
+        pad = " " * indent
+        lines = ",\n".join(pad + json.dumps(row, ensure_ascii=False) for row in rows)
+        return "[\n" + lines + "\n" + " " * (indent - 4) + "]"
+
+    stream.write("{\n")
+    items = list(data.items())
+    for i, (key, value) in enumerate(items):
+        stream.write(f"    {json.dumps(key)}: ")
+        if key == "tables":
+            stream.write("{\n")
+            tables = list(value.items())
+            for j, (name, table) in enumerate(tables):
+                stream.write(f"        {json.dumps(name)}: {{\n")
+                fields = list(table.items())
+                for k, (field, content) in enumerate(fields):
+                    stream.write(f"            {json.dumps(field)}: ")
+                    if field == "columns":
+                        stream.write(json.dumps(content))
+                    else:
+                        stream.write(rows_block(content, 16))
+                    stream.write(",\n" if k < len(fields) - 1 else "\n")
+                stream.write("        }" + (",\n" if j < len(tables) - 1 else "\n"))
+            stream.write("    }")
+        else:
+            stream.write(json.dumps(value, ensure_ascii=False))
+        stream.write(",\n" if i < len(items) - 1 else "\n")
+    stream.write("}\n")
+
+
+def write_json_atomic(path, data, compact=False):
+    """Write JSON next to path and move it into place, so readers never see half a file."""
+    folder = os.path.dirname(path) or "."
+    os.makedirs(folder, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            if compact:
+                dump_compact(data, f)
+            else:
+                json.dump(data, f, indent=4)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def row_key(columns, key_columns, row):
+    return tuple(row[columns.index(column)] for column in key_columns)
+
+
+def apply_delta(data, delta):
+    """
+    Return a new catalog with a delta applied.
+
+    Changed rows are replaced in place, removed rows are dropped and added rows are
+    appended. Row order does not affect lookups, so it does not need to match the
+    order of a freshly built catalog.
+    """
+    if delta.get("format") != CATALOG_FORMAT or delta.get("from") != data["version"]:
+        raise CatalogError(f"delta {delta.get('from')}->{delta.get('to')} does not apply to version {data['version']}")
+
+    tables = {}
+    for name, table in data["tables"].items():
+        tables[name] = {"columns": list(table["columns"]), "rows": list(table["rows"])}
+
+    for name, changes in delta["tables"].items():
+        if name not in tables:
+            tables[name] = {"columns": changes["columns"], "rows": []}
+        table = tables[name]
+        columns = table["columns"]
+        if changes["columns"] != columns:
+            raise CatalogError(f"delta columns of {name} do not match the catalog")
+        key_columns = TABLES[name][1]
+
+        removed = {tuple(key) for key in changes.get("removed", [])}
+        changed = {row_key(columns, key_columns, row): row for row in changes.get("changed", [])}
+        rows = []
+        for row in table["rows"]:
+            key = row_key(columns, key_columns, row)
+            if key in removed:
+                continue
+            rows.append(changed.pop(key, row))
+        if changed:
+            raise CatalogError(f"delta changes rows missing from {name}")
+        rows.extend(changes.get("added", []))
+        table["rows"] = rows
+
+    result = {
+        "format": CATALOG_FORMAT,
+        "version": delta["to"],
+        "base_url": delta.get("base_url", data["base_url"]),
+        "digest": delta["digest"],
+        "tables": tables,
+    }
+    if catalog_digest(result) != delta["digest"]:
+        raise CatalogError(f"catalog digest mismatch after applying delta {delta['to']}")
+    return result
+
+
+def make_delta(old, new):
+    """Compute the delta that turns catalog old into catalog new."""
+    delta = {
+        "format": CATALOG_FORMAT,
+        "from": old["version"],
+        "to": new["version"],
+        "base_url": new["base_url"],
+        "digest": new["digest"],
+        "tables": {},
+    }
+    for name, table in new["tables"].items():
+        columns = table["columns"]
+        key_columns = TABLES[name][1]
+        old_table = old["tables"].get(name, {"columns": columns, "rows": []})
+        if old_table["columns"] != columns:
+            raise CatalogError(f"columns of {name} changed, publish a full catalog only")
+        old_rows = {row_key(columns, key_columns, row): row for row in old_table["rows"]}
+        new_keys = set()
+        added, changed = [], []
+        for row in table["rows"]:
+            key = row_key(columns, key_columns, row)
+            new_keys.add(key)
+            if key not in old_rows:
+                added.append(row)
+            elif old_rows[key] != row:
+                changed.append(row)
+        removed = [list(key) for key in old_rows if key not in new_keys]
+        if added or changed or removed:
+            delta["tables"][name] = {"columns": columns, "added": added, "changed": changed, "removed": removed}
+    return delta
+
+
+def fetch_json(url, timeout=30):
+    """Download and parse a JSON document, accepting a gzip-encoded response."""
+    request = urllib.request.Request(url, headers={"Accept-Encoding": "gzip"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        body = response.read()
+        if response.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+    return json.loads(body.decode("utf-8"))
+
+
+def update_catalog(catalog_dir=CATALOG_DIR, remote_base_url=REMOTE_BASE_URL):
+    """
+    Bring the local catalog up to the published version.
+
+    Only the small version file is downloaded when the catalog is current. Otherwise
+    the missing deltas are chained, and the full catalog is downloaded if that fails.
+    Returns the version of the local catalog afterwards.
+    """
+    local = load_catalog(catalog_dir).data
+    catalog_path = os.path.join(catalog_dir, CATALOG_FILENAME)
+
+    try:
+        remote_version = fetch_json(remote_base_url + VERSION_FILENAME)["version"]
+    except Exception as e:
+        print(f"Failed to check the catalog version: {e}. Skipping update check.")
+        return local["version"]
+
+    if local["version"] == remote_version:
+        print(f"Catalog is already up to date (version {remote_version}).")
+        return local["version"]
+
+    if 0 < local["version"] < remote_version and remote_version - local["version"] <= MAX_DELTA_CHAIN:
+        try:
+            data = local
+            for version in range(local["version"] + 1, remote_version + 1):
+                delta = fetch_json(f"{remote_base_url}{DELTAS_DIRNAME}/{version}.json")
+                data = apply_delta(data, delta)
+            write_json_atomic(catalog_path, data, compact=True)
+            print(f"Updated catalog from version {local['version']} to {remote_version} with deltas.")
+            return remote_version
+        except Exception as e:
+            print(f"Delta update failed ({e}), downloading the full catalog.")
+
+    try:
+        data = fetch_json(remote_base_url + CATALOG_FILENAME)
+        if data.get("format") != CATALOG_FORMAT or catalog_digest(data) != data.get("digest"):
+            raise CatalogError("downloaded catalog is invalid")
+        write_json_atomic(catalog_path, data, compact=True)
+        print(f"Downloaded catalog version {data['version']}.")
+        return data["version"]
+    except Exception as e:
+        print(f"Error while updating the catalog: {e}")
+        return local["version"]
+
+
+def cdn_base_url(url):
+    """Everything up to and including the client version folder, e.g. ".../core/134.14.8B/"."""
+    marker = "/core/"
+    if marker not in url:
+        return url.rsplit("/", 1)[0] + "/"
+    start = url.index(marker) + len(marker)
+    return url[: url.index("/", start) + 1]
+
+
+def build_from_sources(source_dir=CATALOG_DIR):
+    """Build catalog tables from the verbose AddressablesJSON hash and URL files."""
+    base_url = None
+    tables = {}
+    for name, (hash_columns, _, hashes_file, urls_file) in TABLES.items():
+        with open(os.path.join(source_dir, hashes_file), "r", encoding="utf-8") as f:
+            hash_records = json.load(f)
+        with open(os.path.join(source_dir, urls_file), "r", encoding="utf-8") as f:
+            url_records = json.load(f)
+        if len(hash_records) != len(url_records):
+            raise CatalogError(f"{hashes_file} and {urls_file} have a different number of records")
+
+        plain_columns = [c for c in hash_records[0] if c not in hash_columns]
+        path_columns = [c.replace("_id", "_path") for c in hash_columns]
+        rows = []
+        # The two files list the same records in the same order
+        for record, url_record in zip(hash_records, url_records):
+            if (record["ID"], record.get("skin_code")) != (url_record["ID"], url_record.get("skin_code")):
+                raise CatalogError(f"{hashes_file} and {urls_file} are out of order at {record['ID']}")
+            paths = []
+            for column in hash_columns:
+                url = url_record[column]
+                if base_url is None:
+                    base_url = cdn_base_url(url)
+                if not url.startswith(base_url):
+                    raise CatalogError(f"{url} does not share the CDN base {base_url}")
+                if record[column] not in url:
+                    # Without the hash in it the stored path could never follow a hash change
+                    raise CatalogError(f"{url} does not contain the {column} {record[column]} of {record['ID']}")
+                paths.append(url[len(base_url):].replace(record[column], HASH_PLACEHOLDER))
+            rows.append([record[c] for c in plain_columns] + [record[c] for c in hash_columns] + paths)
+        columns = plain_columns + hash_columns + path_columns
+        tables[name] = {"columns": columns, "rows": rows}
+
+    data = {"format": CATALOG_FORMAT, "version": 0, "base_url": base_url or "", "digest": "", "tables": tables}
+    data["digest"] = catalog_digest(data)
+    return data
+
+
+def publish(catalog_dir=CATALOG_DIR):
+    """Rebuild the catalog from the sources; bump the version and write a delta if it changed."""
+    catalog_path = os.path.join(catalog_dir, CATALOG_FILENAME)
+    old = load_catalog(catalog_dir).data
+    new = build_from_sources(catalog_dir)
+
+    if old["version"] and new["digest"] == old["digest"]:
+        print(f"Catalog unchanged (version {old['version']}).")
+        return old["version"]
+
+    new["version"] = old["version"] + 1
+    if old["version"]:
+        delta = make_delta(old, new)
+        write_json_atomic(os.path.join(catalog_dir, DELTAS_DIRNAME, f"{new['version']}.json"), delta, compact=True)
+
+    # Deltas older than the longest chain clients will apply are never fetched
+    deltas_dir = os.path.join(catalog_dir, DELTAS_DIRNAME)
+    if os.path.isdir(deltas_dir):
+        for filename in os.listdir(deltas_dir):
+            version = os.path.splitext(filename)[0]
+            if version.isdigit() and int(version) <= new["version"] - MAX_DELTA_CHAIN:
+                os.remove(os.path.join(deltas_dir, filename))
+
+    write_json_atomic(catalog_path, new, compact=True)
+    write_json_atomic(os.path.join(catalog_dir, VERSION_FILENAME), {"version": new["version"]})
+    print(f"Published catalog version {new['version']}.")
+    return new["version"]
+
+
+if __name__ == "__main__":
+    publish()
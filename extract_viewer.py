@@ -1,52 +1,173 @@
 import os
+import json
 import shutil
 import zipfile
+import zlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Configuration
 output_folder = "SpineViewer-anosu"
 zip_filename = "SpineViewer.zip"
 zip_path = os.path.join(output_folder, zip_filename)
-files_to_keep = [zip_filename, "LICENSE.txt"]  # Files to skip during cleaning
-
-def clean_folder_keep_files(folder_path, keep_files):
-    """Clean folder contents except for the specified files"""
-    if not os.path.exists(folder_path):
-        os.makedirs(folder_path)
-        return
-    
-    for filename in os.listdir(folder_path):
-        if filename in keep_files:
-            continue  # Skip files we want to keep
-        
-        file_path = os.path.join(folder_path, filename)
-        try:
-            if os.path.isfile(file_path) or os.path.islink(file_path):
-                os.unlink(file_path)
-            elif os.path.isdir(file_path):
-                shutil.rmtree(file_path)
-        except Exception as e:
-            print(f"[!] Failed to delete {file_path}: {e}")
-
-# Skip download – assume zip file already exists
-if not os.path.exists(zip_path):
-    print(f"[!] ZIP file not found at {zip_path}. Cannot proceed.")
-    exit(1)
-else:
-    print(f"[✓] ZIP file found at {zip_path}. Cleaning folder before extraction...")
-
-# Clean the folder (keep only the zip file and LICENSE.txt)
-clean_folder_keep_files(output_folder, files_to_keep)
-print("[✓] Folder cleaned (kept .zip file and LICENSE.txt)")
-
-# Extract the zip
-print("[*] Extracting contents...")
-with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-    zip_ref.extractall(output_folder)
-print(f"[+] Extracted to {output_folder}")
-
-# Final cleanup - delete the zip
-try:
-    os.remove(zip_path)
-    print("[✓] Cleaned up .zip file. Done!")
-except Exception as e:
-    print(f"[!] Failed to delete zip file: {e}")
\ No newline at end of file
+files_to_keep = [zip_filename, "LICENSE.txt"]  # Files carried over untouched
+manifest_filename = ".viewer_manifest.json"  # CRC32/size of every installed zip entry
+staging_folder = output_folder + ".staging"  # New install is assembled here
+backup_folder = output_folder + ".old"  # Previous install while swapping
+chunk_size = 1024 * 1024
+max_workers = min(8, (os.cpu_count() or 1) + 4)
+
+def recover_interrupted_update():
+    """Undo the leftovers of an update that stopped halfway"""
+    if os.path.isdir(backup_folder):
+        if not os.path.exists(output_folder):
+            # Stopped between the two renames of the swap, put the old install back
+            os.rename(backup_folder, output_folder)
+            print("[!] Restored previous viewer after an interrupted update")
+        else:
+            shutil.rmtree(backup_folder, ignore_errors=True)
+    if os.path.isdir(staging_folder):
+        shutil.rmtree(staging_folder, ignore_errors=True)
+
+def load_manifest(folder_path):
+    """Load the {entry name: {"crc": int, "size": int}} manifest of an install"""
+    try:
+        with open(os.path.join(folder_path, manifest_filename), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def file_crc32(file_path):
+    """Stream a file through CRC32"""
+    crc = 0
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+def is_unchanged(info, installed_path, manifest):
+    """Check an installed file against its zip entry without reading the zip data"""
+    if not os.path.isfile(installed_path) or os.path.getsize(installed_path) != info.file_size:
+        return False
+    recorded = manifest.get(info.filename)
+    if recorded is not None:
+        return recorded["crc"] == info.CRC and recorded["size"] == info.file_size
+    # No manifest yet (first incremental update), compare against the file itself
+    return file_crc32(installed_path) == info.CRC
+
+def safe_target(folder_path, name):
+    """Resolve a zip entry inside folder_path, or None if it would escape it"""
+    target = os.path.normpath(os.path.join(folder_path, name))
+    if os.path.isabs(name) or os.path.commonpath([os.path.abspath(folder_path), os.path.abspath(target)]) != os.path.abspath(folder_path):
+        return None
+    return target
+
+def carry_over(src, dst):
+    """Reuse an installed file in the staging folder, hardlinking when possible"""
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def plan_update(zip_ref, manifest):
+    """Split the zip entries into files to reuse from the current install and files to extract"""
+    reuse, extract = [], []
+    for info in zip_ref.infolist():
+        if info.is_dir() or safe_target(output_folder, info.filename) is None:
+            continue
+        installed_path = os.path.join(output_folder, info.filename)
+        if is_unchanged(info, installed_path, manifest):
+            reuse.append(info)
+        else:
+            extract.append(info)
+    return reuse, extract
+
+def extract_entries(entries):
+    """Stream the given zip entries into the staging folder in parallel"""
+    local = threading.local()
+    handles = []
+    handles_lock = threading.Lock()
+
+    def extract(info):
+        # ZipFile objects are not safe to share between threads, give each worker its own
+        if not hasattr(local, "zip_ref"):
+            local.zip_ref = zipfile.ZipFile(zip_path, 'r')
+            with handles_lock:
+                handles.append(local.zip_ref)
+        target = os.path.join(staging_folder, info.filename)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with local.zip_ref.open(info) as src, open(target, 'wb') as dst:
+            shutil.copyfileobj(src, dst, chunk_size)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # list() re-raises the first failure, which aborts the update
+            list(executor.map(extract, entries))
+    finally:
+        for handle in handles:
+            handle.close()
+
+def build_staging(zip_ref):
+    """Assemble the new install in the staging folder and return (reused, extracted) counts"""
+    manifest = load_manifest(output_folder)
+    reuse, extract = plan_update(zip_ref, manifest)
+    os.makedirs(staging_folder)
+
+    for info in zip_ref.infolist():
+        if info.is_dir() and safe_target(staging_folder, info.filename) is not None:
+            os.makedirs(os.path.join(staging_folder, info.filename), exist_ok=True)
+
+    for info in reuse:
+        carry_over(os.path.join(output_folder, info.filename), os.path.join(staging_folder, info.filename))
+    extract_entries(extract)
+
+    for filename in files_to_keep:
+        kept_path = os.path.join(output_folder, filename)
+        if filename != zip_filename and os.path.isfile(kept_path) and not os.path.exists(os.path.join(staging_folder, filename)):
+            carry_over(kept_path, os.path.join(staging_folder, filename))
+
+    new_manifest = {
+        info.filename: {"crc": info.CRC, "size": info.file_size}
+        for info in reuse + extract
+    }
+    with open(os.path.join(staging_folder, manifest_filename), 'w', encoding='utf-8') as f:
+        json.dump(new_manifest, f, indent=4)
+
+    return len(reuse), len(extract)
+
+def swap_in_staging():
+    """Replace the current install with the staging folder; stale files go with the old install"""
+    os.rename(output_folder, backup_folder)
+    os.rename(staging_folder, output_folder)
+    shutil.rmtree(backup_folder, ignore_errors=True)
+
+if __name__ == "__main__":
+    recover_interrupted_update()
+
+    # Skip download – assume zip file already exists
+    if not os.path.exists(zip_path):
+        print(f"[!] ZIP file not found at {zip_path}. Cannot proceed.")
+        exit(1)
+    else:
+        print(f"[✓] ZIP file found at {zip_path}. Comparing with installed files...")
+
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            reused, extracted = build_staging(zip_ref)
+        print(f"[*] {extracted} changed file(s) extracted, {reused} unchanged file(s) kept")
+    except Exception as e:
+        shutil.rmtree(staging_folder, ignore_errors=True)
+        print(f"[!] Update failed, the installed viewer was left untouched: {e}")
+        exit(1)
+
+    # The zip stays behind in the old install and is deleted along with it
+    try:
+        swap_in_staging()
+    except OSError as e:
+        # Usually a viewer that is still running and holding its files open
+        recover_interrupted_update()
+        print(f"[!] Could not replace the installed viewer, close it and try again: {e}")
+        exit(1)
+    print(f"[+] Installed to {output_folder}")
+    print("[✓] Cleaned up .zip file and stale files. Done!")
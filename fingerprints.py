@@ -0,0 +1,110 @@
+"""
+Content fingerprints of mod files, cached by size and modification time.
+
+A fingerprint is a BLAKE2b digest of the whole file, so two files with the same
+fingerprint are byte-identical. Files are only hashed again when their size or
+mtime changes, which keeps rescans of large mods folders cheap.
+"""
+import os
+import json
+import hashlib
+import threading
+
+FINGERPRINT_CACHE_FILE = "fingerprint_cache.json"
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_fingerprint(file_path):
+    """Hash the contents of a file."""
+    h = hashlib.blake2b(digest_size=16)
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(file_path, "rb", buffering=0) as f:
+        while n := f.readinto(buffer):
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def stat_key(file_path):
+    """The (size, mtime_ns) pair a cached fingerprint is valid for."""
+    st = os.stat(file_path)
+    return st.st_size, st.st_mtime_ns
+
+
+class FingerprintStore:
+    """
+    On-disk cache of {absolute path: [size, mtime_ns, fingerprint]}.
+
+    Safe to share between the GUI thread and background workers.
+    """
+
+    def __init__(self, cache_file=FINGERPRINT_CACHE_FILE):
+        self.cache_file = cache_file
+        self.entries = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading fingerprint cache: {e}")
+
+    def cached(self, file_path):
+        """Return the fingerprint of a file if it is cached and still valid, without hashing."""
+        with self.lock:
+            entry = self.entries.get(os.path.abspath(file_path))
+        if not entry:
+            return None
+        try:
+            if tuple(entry[:2]) != stat_key(file_path):
+                return None
+        except OSError:
+            return None
+        return entry[2]
+
+    def record(self, file_path, size, mtime_ns, fingerprint):
+        """Remember a fingerprint computed elsewhere (e.g. in a worker process)."""
+        with self.lock:
+            self.entries[os.path.abspath(file_path)] = [size, mtime_ns, fingerprint]
+            self.dirty = True
+
+    def fingerprint(self, file_path):
+        """Return the fingerprint of a file, hashing it only if the cache is stale."""
+        fingerprint = self.cached(file_path)
+        if fingerprint is None:
+            size, mtime_ns = stat_key(file_path)
+            fingerprint = file_fingerprint(file_path)
+            self.record(file_path, size, mtime_ns, fingerprint)
+        return fingerprint
+
+    def prune(self, folder, existing_paths):
+        """
+        Forget files directly inside a folder that are no longer in the given collection of paths.
+
+        Entries of subfolders are kept, so pointing at a parent folder for a moment
+        (e.g. while typing its path) does not throw away the cache of a mods folder.
+        """
+        folder = os.path.abspath(folder)
+        keep = {os.path.abspath(p) for p in existing_paths}
+        with self.lock:
+            for path in [p for p in self.entries if os.path.dirname(p) == folder and p not in keep]:
+                del self.entries[path]
+                self.dirty = True
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            entries = dict(self.entries)
+            self.dirty = False
+        temp_path = self.cache_file + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(temp_path, self.cache_file)
+        except Exception as e:
+            with self.lock:
+                self.dirty = True
+            print(f"Error saving fingerprint cache: {e}")
@@ -4,14 +4,14 @@ import hashlib
 import http.client
 import urllib.parse
 from re import findall
-from time import sleep
 from io import BytesIO
 from gzip import GzipFile
-from requests import get
+from requests import Session
 from gazpacho import Soup
 from argparse import ArgumentParser
-from os import path, makedirs, remove, chdir, getcwd
-from threading import BoundedSemaphore, Thread, Event
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from os import path, makedirs, remove, replace, chdir, getcwd
+from threading import Event, Lock
 import sys
 
 
@@ -37,6 +37,117 @@ HEADERS = {
     "Accept-Encoding": "gzip",
 }
 
+# Size of the buffer used when streaming downloads and hashing files on disk
+CHUNK_SIZE = 1024 * 1024
+
+# Suffix of the file a download is streamed into until its hash has been verified
+PARTIAL_SUFFIX = ".part"
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP(S) connections shared between download workers, keyed by host.
+
+    Example:
+        >>> conn, response = POOL.request("https://download.mediafire.com/file.zip")
+        >>> data = response.read()
+        >>> POOL.release(conn)
+    """
+
+    def __init__(self, timeout: float = 60):
+        self.timeout = timeout
+        self._idle: dict[tuple[str, str], list[http.client.HTTPConnection]] = {}
+        self._lock = Lock()
+
+    def acquire(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        """
+        Takes an idle connection to the host, or opens a new one if there is none.
+
+        Parameters:
+            scheme (str): Either 'http' or 'https'.
+            netloc (str): The host (and optional port) to connect to.
+
+        Returns:
+            http.client.HTTPConnection: A connection that is owned by the caller until released.
+        """
+        key = (scheme, netloc)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(netloc, timeout=self.timeout)
+        else:
+            conn = http.client.HTTPConnection(netloc, timeout=self.timeout)
+        conn.pool_key = key
+        return conn
+
+    def release(self, conn: http.client.HTTPConnection, reusable: bool = True) -> None:
+        """
+        Hands a connection back to the pool.
+
+        Parameters:
+            conn (http.client.HTTPConnection): A connection obtained from acquire() or request().
+            reusable (bool): False if the last response was not read to the end, in which
+                case the connection is closed instead of being kept alive.
+
+        Returns:
+            None
+        """
+        if not reusable:
+            conn.close()
+            return
+        with self._lock:
+            self._idle.setdefault(conn.pool_key, []).append(conn)
+
+    def request(
+        self, url: str, headers: dict = HEADERS
+    ) -> tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """
+        Sends a GET request over a pooled connection.
+
+        A kept-alive connection the server has already dropped is replaced by a fresh
+        one and the request is sent again.
+
+        Parameters:
+            url (str): The URL to request.
+            headers (dict): The request headers. Default is HEADERS.
+
+        Returns:
+            tuple: The connection and its response. The connection must be released
+                once the response body has been consumed.
+        """
+        parsed_url = urllib.parse.urlparse(url)
+        target = parsed_url.path or "/"
+        if parsed_url.query:
+            target += f"?{parsed_url.query}"
+
+        for attempt in range(2):
+            conn = self.acquire(parsed_url.scheme, parsed_url.netloc)
+            try:
+                conn.request("GET", target, headers=headers)
+                return conn, conn.getresponse()
+            except (ConnectionError, http.client.ImproperConnectionState):
+                conn.close()
+                if attempt:
+                    raise
+
+    def close(self) -> None:
+        """Closes every idle connection in the pool."""
+        with self._lock:
+            for connections in self._idle.values():
+                for conn in connections:
+                    conn.close()
+            self._idle.clear()
+
+
+# Connections used for the file downloads themselves
+POOL = ConnectionPool()
+
+# Session used for the Mediafire API calls
+SESSION = Session()
+
 
 def hash_file(filename: str) -> str:
     """
@@ -52,20 +163,28 @@ def hash_file(filename: str) -> str:
         FileNotFoundError: If the specified file does not exist.
         PermissionError: If the user does not have permission to read the file.
     """
-    # make a hash object
-    h = hashlib.sha256()
+    return update_hash(hashlib.sha256(), filename).hexdigest()
 
-    # open file for reading in binary mode
-    with open(filename, "rb") as file:
-        # loop till the end of the file
-        chunk = 0
-        while chunk != b"":
-            # read only 1024 bytes at a time
-            chunk = file.read(1024)
-            h.update(chunk)
 
-    # return the hex representation of digest
-    return h.hexdigest()
+def update_hash(h: "hashlib._Hash", filename: str) -> "hashlib._Hash":
+    """
+    Feed the contents of a file into an existing hash object.
+
+    Args:
+        h (hashlib._Hash): The hash object to update.
+        filename (str): The path to the file.
+
+    Returns:
+        hashlib._Hash: The same hash object, for chaining.
+    """
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+
+    with open(filename, "rb", buffering=0) as file:
+        while n := file.readinto(buffer):
+            h.update(view[:n])
+
+    return h
 
 
 def normalize_file_or_folder_name(filename: str) -> str:
@@ -182,13 +301,17 @@ def main():
 
     t, key = folder_or_file[0]
 
-    if t in {"file", "file_premium"}:
-        get_file(key, args.output)
-    elif t == "folder":
-        get_folders(key, args.output, args.threads, first=True)
-    else:
-        print(f"{bcolors.FAIL}Invalid link{bcolors.ENDC}")
-        exit(1)
+    try:
+        if t in {"file", "file_premium"}:
+            get_file(key, args.output)
+        elif t == "folder":
+            get_folders(key, args.output, args.threads, first=True)
+        else:
+            print(f"{bcolors.FAIL}Invalid link{bcolors.ENDC}")
+            exit(1)
+    finally:
+        POOL.close()
+        SESSION.close()
 
     print(f"{bcolors.OKGREEN}{bcolors.BOLD}All downloads completed{bcolors.ENDC}")
     exit(0)
@@ -257,7 +380,7 @@ def get_folders(
         >>> get_folders('folder_key_123', '/path/to/download', 5, first=True)
     """
     if first:
-        r = get(get_files_or_folders_api_endpoint("folder", folder_key, info=True))
+        r = SESSION.get(get_files_or_folders_api_endpoint("folder", folder_key, info=True))
         if r.status_code != 200:
             message = r.json()["response"]["message"]
             print(f"{bcolors.FAIL}{message}{bcolors.ENDC}")
@@ -277,7 +400,7 @@ def get_folders(
     download_folder(folder_key, threads_num)
 
     # Searching for other folders
-    folder_content = get(
+    folder_content = SESSION.get(
         get_files_or_folders_api_endpoint("folders", folder_key)
     ).json()["response"]["folder_content"]
 
@@ -294,7 +417,7 @@ def download_folder(folder_key: str, threads_num: int) -> None:
 
     Parameters:
         folder_key (str): The unique identifier of the folder.
-        threads_num (int): Number of threads to use for downloading.
+        threads_num (int): Number of worker threads in the download pool.
 
     Returns:
         None
@@ -311,7 +434,7 @@ def download_folder(folder_key: str, threads_num: int) -> None:
         # If there are more than 100 files, make another request
         # and append the result to data
         while more_chunks:
-            r_json = get(
+            r_json = SESSION.get(
                 get_files_or_folders_api_endpoint("files", folder_key, chunk=chunk)
             ).json()
             more_chunks = r_json["response"]["folder_content"]["more_chunks"] == "yes"
@@ -323,40 +446,26 @@ def download_folder(folder_key: str, threads_num: int) -> None:
         return
 
     event = Event()
-    threadLimiter = BoundedSemaphore(threads_num)
-    total_threads: list[Thread] = []
-
-    # Appending a new thread for downloading every link
-    for file in data:
-        total_threads.append(
-            Thread(
-                target=download_file,
-                args=(
-                    file,
-                    event,
-                    threadLimiter,
-                ),
-            )
-        )
-
-    # Starting all threads
-    for thread in total_threads:
-        thread.start()
+    executor = ThreadPoolExecutor(max_workers=threads_num)
+    pending = {executor.submit(download_file, file, event) for file in data}
 
     # Handle being interrupted
     try:
-        while True:
-            if all(not t.is_alive() for t in total_threads):
-                break
-            sleep(0.01)
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception():
+                    print(f"{bcolors.FAIL}{future.exception()}{bcolors.ENDC}")
     except KeyboardInterrupt:
         print(f"{bcolors.WARNING}Closing all threads{bcolors.ENDC}")
         event.set()
-        for thread in total_threads:
-            thread.join()
+        executor.shutdown(wait=True, cancel_futures=True)
+        POOL.close()
         print(f"{bcolors.WARNING}{bcolors.BOLD}Download interrupted{bcolors.ENDC}")
         exit(0)
 
+    executor.shutdown()
+
 
 def get_file(key: str, output_path: str = None) -> None:
     """
@@ -373,7 +482,7 @@ def get_file(key: str, output_path: str = None) -> None:
         >>> get_file('file_key_123', '/path/to/download')
     """
     # Retrieve file information
-    file_data = get(get_info_endpoint(key)).json()["response"]["file_info"]
+    file_data = SESSION.get(get_info_endpoint(key)).json()["response"]["file_info"]
 
     # Change directory if output_path is provided
     if output_path:
@@ -400,16 +509,17 @@ def format_size(bytes_size: int) -> str:
     return f"{bytes_size:.2f} PB"
 
 
-def download_file(
-    file: dict, event: Event = None, limiter: BoundedSemaphore = None
-) -> None:
+def download_file(file: dict, event: Event = None) -> None:
     """
     Downloads a file from a direct link obtained from Mediafire.
 
+    The file is streamed into a ``.part`` file and hashed on the fly, so it is verified
+    without being read back. An interrupted download leaves the ``.part`` file behind
+    and is resumed with a Range request the next time.
+
     Parameters:
         file (dict): A dictionary containing file information, including the direct download link.
         event (Event): An optional threading event used for handling interruptions.
-        limiter (BoundedSemaphore): An optional semaphore for controlling the number of concurrent downloads.
 
     Returns:
         None
@@ -417,119 +527,160 @@ def download_file(
     Example:
         >>> download_file({'filename': 'example_file.txt', 'links': {'normal_download': 'https://www.mediafire.com/download/example_file.txt'}})
     """
-    # Acquire semaphore if available
-    if limiter:
-        limiter.acquire()
-
     # Extract direct download link from file information
     download_link = file["links"]["normal_download"]
+    expected_hash = file.get("hash")
 
     # Normalize filename
     filename = normalize_file_or_folder_name(file["filename"])
+    partial_filename = filename + PARTIAL_SUFFIX
 
     # Check if file already exists and is not corrupted
     if path.exists(filename):
-        if hash_file(filename) == file["hash"]:
+        if expected_hash and hash_file(filename) == expected_hash:
             print(f"{bcolors.WARNING}{filename}{bcolors.ENDC} already exists, skipping")
-            if limiter:
-                limiter.release()
             return
         else:
             print(
                 f"{bcolors.WARNING}{filename}{bcolors.ENDC} already exists but corrupted, downloading again"
             )
 
-    # Start downloading the file
-    print(f"{bcolors.OKBLUE}Downloading {filename}{bcolors.ENDC}")
-
-    if event:
-        if event.is_set():
-            if limiter:
-                limiter.release()
-            return
-
-    parsed_url = urllib.parse.urlparse(download_link)
+    if event and event.is_set():
+        return
 
-    conn = http.client.HTTPConnection(parsed_url.netloc)
-    conn.request(
-        "GET",
-        parsed_url.path,
-        headers=HEADERS,
-    )
+    # Resume from a previous partial download if there is one
+    offset = path.getsize(partial_filename) if path.exists(partial_filename) else 0
+    headers = HEADERS
+    if offset:
+        headers = {**HEADERS, "Range": f"bytes={offset}-"}
+        print(f"{bcolors.OKBLUE}Resuming {filename}{bcolors.ENDC}")
+    else:
+        print(f"{bcolors.OKBLUE}Downloading {filename}{bcolors.ENDC}")
 
-    response = conn.getresponse()
+    conn, response = POOL.request(download_link, headers)
 
     # Check if the link is not a direct download link and extract the actual download link
     if response.getheader("Content-Encoding") == "gzip":
         compressed_data = response.read()
-        conn.close()
+        POOL.release(conn)
         with GzipFile(fileobj=BytesIO(compressed_data)) as f:
             html = f.read().decode("utf-8")
 
-            # Parse HTML content to extract the actual download link
-            soup = Soup(html)
-            download_link = soup.find("a", {"id": "downloadButton"}).attrs["href"]
-            parsed_url = urllib.parse.urlparse(download_link)
-            conn = http.client.HTTPConnection(parsed_url.netloc)
-            conn.request(
-                "GET",
-                parsed_url.path,
-                headers=HEADERS,
-            )
+        # Parse HTML content to extract the actual download link
+        soup = Soup(html)
+        download_link = soup.find("a", {"id": "downloadButton"}).attrs["href"]
+        conn, response = POOL.request(download_link, headers)
 
-            response = conn.getresponse()
+    h = hashlib.sha256()
 
-    if 400 <= response.status < 600:
-        conn.close()
+    if response.status == 416 and offset:
+        # The partial file already holds the whole file
+        response.read()
+        POOL.release(conn)
+        update_hash(h, partial_filename)
+    elif 400 <= response.status < 600:
+        response.read()
+        POOL.release(conn)
         print_error(download_link)
-        if limiter:
-            limiter.release()
         return
+    else:
+        if response.status == 206:
+            update_hash(h, partial_filename)
+            mode = "ab"
+        else:
+            # The server ignored the Range header, start over
+            offset = 0
+            mode = "wb"
+
+        try:
+            completed = stream_response(response, partial_filename, mode, offset, h, event)
+        except BaseException:
+            # The socket is in an unknown state, close it; the .part file stays for resuming
+            POOL.release(conn, reusable=False)
+            raise
+
+        if not completed:
+            POOL.release(conn, reusable=False)
+            print(
+                f"{bcolors.WARNING}Partially downloaded {partial_filename} kept for resuming{bcolors.ENDC}"
+            )
+            return
+        POOL.release(conn)
+
+    if expected_hash and h.hexdigest() != expected_hash:
+        remove(partial_filename)
+        if offset:
+            # The .part file most likely belongs to an older upload of the same link,
+            # download the whole file again (there is no .part left, so this happens once)
+            print(
+                f"{bcolors.WARNING}Resumed {filename} does not match, downloading it from the start{bcolors.ENDC}"
+            )
+            return download_file(file, event)
+        print(f"{bcolors.FAIL}{filename} is corrupted after downloading, deleted{bcolors.ENDC}")
+        return
+
+    replace(partial_filename, filename)
+    print(f"\r{bcolors.OKGREEN}{filename} downloaded successfully!{bcolors.ENDC}")
+
+
+def stream_response(
+    response: http.client.HTTPResponse,
+    filename: str,
+    mode: str,
+    offset: int,
+    h: "hashlib._Hash",
+    event: Event = None,
+) -> bool:
+    """
+    Writes a response body to a file, feeding every chunk into a hash object as well.
 
-    file_size = int(response.getheader('Content-Length', 0))
-    downloaded = 0
+    Parameters:
+        response (http.client.HTTPResponse): The response to read the body from.
+        filename (str): The file to write to.
+        mode (str): 'wb' to start a new file, 'ab' to append to a partial one.
+        offset (int): The number of bytes already present in the file.
+        h (hashlib._Hash): The hash object to update with the downloaded bytes.
+        event (Event): An optional threading event used for handling interruptions.
+
+    Returns:
+        bool: False if the download was interrupted, True otherwise.
+    """
+    file_size = int(response.getheader("Content-Length", 0))
+    if file_size:
+        file_size += offset
+    downloaded = offset
     last_progress = -1
-    
-    with open(filename, "wb") as f:
-        while True:
-            chunk = response.read(4096)
+    label = filename.removesuffix(PARTIAL_SUFFIX)
+
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
 
+    with open(filename, mode) as f:
+        while n := response.readinto(buffer):
             # Check if download was interrupted
             if event and event.is_set():
-                conn.close()
-                f.close()
-                remove(filename)
-                print(
-                    f"{bcolors.WARNING}Partially downloaded {filename} deleted{bcolors.ENDC}"
-                )
-                if limiter:
-                    limiter.release()
-                return
-            if not chunk:
-                break
+                return False
+
+            chunk = view[:n]
             f.write(chunk)
-            downloaded += len(chunk)
-            
+            h.update(chunk)
+            downloaded += n
+
             # Update progress if file size is known
             if file_size > 0:
                 progress = int(downloaded / file_size * 100)
                 if progress != last_progress:
                     last_progress = progress
                     size_str = f"{format_size(downloaded)}/{format_size(file_size)}"
-                    sys.stdout.write(f"\r{bcolors.OKBLUE}Downloading {filename}: {progress}% ({size_str}){bcolors.ENDC}")
+                    sys.stdout.write(f"\r{bcolors.OKBLUE}Downloading {label}: {progress}% ({size_str}){bcolors.ENDC}")
                     sys.stdout.flush()
 
-    # Clear the progress line and print completion
+    # Clear the progress line
     if file_size > 0:
-        sys.stdout.write("\r" + " " * (len(filename) + 40))  # Clear line
+        sys.stdout.write("\r" + " " * (len(label) + 40))  # Clear line
         sys.stdout.flush()
-    print(f"\r{bcolors.OKGREEN}{filename} downloaded successfully!{bcolors.ENDC}")
-
-    conn.close()
 
-    # Release semaphore if acquired
-    if limiter:
-        limiter.release()
+    return True
 
 
 if __name__ == "__main__":
@@ -0,0 +1,131 @@
+"""
+Library-wide checks of the mods folder.
+
+Mods are grouped by the naps file they replace (their slot) and by content
+fingerprint. Several mods in one slot cannot be active at the same time, and
+byte-identical files under different names only waste disk space.
+"""
+import os
+from catalog import is_event_id
+
+
+def target_slot(info, catalog):
+    """Return the naps hash a mod replaces, or None if the catalog does not know it."""
+    row = catalog.find(info['id'], info['skin'])
+    if not row:
+        return None
+    # Event mods are always lobby type, standard mods can be lobby or burst
+    hash_key = "lobby_id" if is_event_id(info['id']) else f"{info['type'].lower()}_id"
+    return row.get(hash_key)
+
+
+def slot_conflicts(mods, catalog):
+    """
+    Group mods that target the same slot.
+
+    mods is an iterable of (path, info) pairs, info as returned by
+    extract_info_from_filename. Returns {slot: [paths]} for slots with more than one mod.
+    """
+    slots = {}
+    for path, info in mods:
+        slot = target_slot(info, catalog)
+        if slot:
+            slots.setdefault(slot, []).append(path)
+    return {slot: paths for slot, paths in slots.items() if len(paths) > 1}
+
+
+def analyze_library(mods, catalog, fingerprints, progress=None, cancelled=None):
+    """
+    Find slot conflicts and duplicate files in a mods library.
+
+    Returns None if cancelled, otherwise a dict with:
+        "slots": {slot: [paths]} of mods replacing the same naps file
+        "duplicates": {fingerprint: [paths]} of byte-identical files stored more than once
+        "wasted_bytes": disk space the duplicates take beyond one copy each
+        "targets": {path: slot} of every mod, None when the slot is unknown
+    Files that are already hardlinked to each other count as a single copy.
+    """
+    mods = list(mods)
+    targets = {path: target_slot(info, catalog) for path, info in mods}
+    by_fingerprint = {}
+    for i, (path, _) in enumerate(mods):
+        if cancelled and cancelled():
+            return None
+        if progress:
+            progress(int(i / len(mods) * 100), os.path.basename(path))
+        try:
+            fingerprint = fingerprints.fingerprint(path)
+            st = os.stat(path)
+        except OSError as e:
+            print(f"Error fingerprinting {path}: {e}")
+            continue
+        by_fingerprint.setdefault(fingerprint, []).append((path, (st.st_dev, st.st_ino), st.st_size))
+
+    duplicates = {}
+    wasted_bytes = 0
+    for fingerprint, files in by_fingerprint.items():
+        copies = {inode for _, inode, _ in files}
+        if len(copies) > 1:
+            duplicates[fingerprint] = sorted(path for path, _, _ in files)
+            wasted_bytes += files[0][2] * (len(copies) - 1)
+
+    if progress:
+        progress(100, "Done")
+    return {
+        "slots": slot_conflicts(mods, catalog),
+        "duplicates": duplicates,
+        "wasted_bytes": wasted_bytes,
+        "targets": targets,
+    }
+
+
+def removable_groups(paths, targets):
+    """
+    Split a duplicate group into files that target the same slot.
+
+    Identical bytes under two names can be one bundle set up for two slots, and
+    removing either would lose a mod, so only same-slot copies may be removed.
+    """
+    by_slot = {}
+    for path in sorted(paths):
+        slot = targets.get(path)
+        # Copies with an unknown target may replace different files, they can only be hardlinked
+        if slot is None:
+            continue
+        by_slot.setdefault(slot, []).append(path)
+    return [group for group in by_slot.values() if len(group) > 1]
+
+
+def resolve_duplicates(duplicates, fingerprints, targets, hardlink=True):
+    """
+    Hardlink or remove duplicate files, keeping the first file of every group.
+
+    Hardlinking works on whole groups. Removing only deletes copies that target the
+    same slot as the kept file (see removable_groups).
+    Returns (number of files handled, list of error messages).
+    """
+    handled = 0
+    errors = []
+    for fingerprint, paths in duplicates.items():
+        groups = [paths] if hardlink else removable_groups(paths, targets)
+        for group in groups:
+            keep, others = group[0], group[1:]
+            for path in others:
+                try:
+                    if hardlink:
+                        if os.path.samefile(keep, path):
+                            continue
+                        # Link under a temporary name first so the duplicate is never missing
+                        temp_path = path + ".linktmp"
+                        os.link(keep, temp_path)
+                        os.replace(temp_path, path)
+                        st = os.stat(path)
+                        fingerprints.record(path, st.st_size, st.st_mtime_ns, fingerprint)
+                    else:
+                        os.remove(path)
+                    handled += 1
+                except OSError as e:
+                    if hardlink and os.path.exists(path + ".linktmp"):
+                        os.remove(path + ".linktmp")
+                    errors.append(f"{os.path.basename(path)}: {e}")
+    return handled, errors
@@ -0,0 +1,85 @@
+"""
+Small previews of mod bundles, cached on disk by content fingerprint.
+
+render_thumbnail() runs in a worker process. It decodes only the first atlas page
+of a bundle and downscales it, so the mods list can show what a mod looks like
+without extracting it or launching the viewer.
+"""
+import os
+import UnityPy
+from fingerprints import file_fingerprint, stat_key
+
+THUMBNAIL_CACHE_DIR = "thumbnail_cache"
+THUMBNAIL_SIZE = 128
+
+
+def thumbnail_path(cache_dir, fingerprint):
+    return os.path.join(cache_dir, f"{fingerprint}.png")
+
+
+def no_thumbnail_path(cache_dir, fingerprint):
+    """Marker for bundles without a texture, so they are not decoded again."""
+    return os.path.join(cache_dir, f"{fingerprint}.none")
+
+
+def cached_thumbnail(cache_dir, fingerprint):
+    """Return the cached thumbnail path, "" if the bundle has none, or None if not rendered yet."""
+    path = thumbnail_path(cache_dir, fingerprint)
+    if os.path.exists(path):
+        return path
+    if os.path.exists(no_thumbnail_path(cache_dir, fingerprint)):
+        return ""
+    return None
+
+
+def first_atlas_page(env):
+    """Find the texture of the first page listed in the Spine atlas, or the first texture."""
+    page_name = None
+    textures = []
+    for obj in env.objects:
+        if obj.type.name == "TextAsset" and page_name is None:
+            name = obj.peek_name() or ""
+            if name.endswith('.atlas') or '.atlas.' in name:
+                text = obj.read().m_Script
+                # The first non-empty line of a Spine atlas is the file name of its first page
+                first_line = next((line.strip() for line in text.splitlines() if line.strip()), "")
+                page_name = os.path.splitext(first_line)[0]
+        elif obj.type.name == "Texture2D":
+            textures.append(obj)
+
+    for obj in textures:
+        if obj.peek_name() == page_name:
+            return obj
+    return textures[0] if textures else None
+
+
+def render_thumbnail(bundle_path, cache_dir=THUMBNAIL_CACHE_DIR, fingerprint=None):
+    """
+    Render the thumbnail of a bundle unless it is already cached.
+
+    Returns (size, mtime_ns, fingerprint, thumbnail path); the path is "" when the
+    bundle contains no texture.
+    """
+    size, mtime_ns = stat_key(bundle_path)
+    if fingerprint is None:
+        fingerprint = file_fingerprint(bundle_path)
+
+    cached = cached_thumbnail(cache_dir, fingerprint)
+    if cached is not None:
+        return size, mtime_ns, fingerprint, cached
+
+    os.makedirs(cache_dir, exist_ok=True)
+    texture = first_atlas_page(UnityPy.load(bundle_path))
+    if texture is None:
+        open(no_thumbnail_path(cache_dir, fingerprint), "wb").close()
+        return size, mtime_ns, fingerprint, ""
+
+    image = texture.read().image
+    image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+
+    # Write next to the final name and rename, so a half-written PNG is never picked up
+    path = thumbnail_path(cache_dir, fingerprint)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    image.save(temp_path, format="PNG")
+    os.replace(temp_path, path)
+    return size, mtime_ns, fingerprint, path